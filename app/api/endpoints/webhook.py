@@ -26,7 +26,7 @@ async def webhook_message(background_tasks: BackgroundTasks,
     """
     body = await request.body()
     form = await request.form()
-    args = request.query_params
+    args = dict(request.query_params)
     background_tasks.add_task(start_webhook_chain, body, form, args)
     return schemas.Response(success=True)
 
@@ -37,6 +37,6 @@ def webhook_message(background_tasks: BackgroundTasks,
     """
     Webhook响应，配置请求中需要添加参数：token=API_TOKEN&source=媒体服务器名
     """
-    args = request.query_params
+    args = dict(request.query_params)
     background_tasks.add_task(start_webhook_chain, None, None, args)
     return schemas.Response(success=True)
@@ -1,4 +1,6 @@
-from typing import Optional, Tuple, Union, Any, List, Generator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import wraps
+from typing import Optional, Tuple, Union, Any, List, Generator, Dict, Callable
 
 from app import schemas
 from app.core.context import MediaInfo
@@ -10,7 +12,32 @@ from app.schemas.event import AuthCredentials, AuthInterceptCredentials
 from app.schemas.types import MediaType, ModuleType, ChainEventType, MediaServerType
 
 
+def _with_plex(default: Any):
+    """
+    解析媒体服务器实例的装饰器，将 server 参数（名称或实例，为空时取默认实例）解析为 Plex 实例后传入，
+    实例不存在时直接返回默认值
+    :param default: 实例不存在时的返回值
+    """
+
+    def decorator(func: Callable):
+        @wraps(func)
+        def wrapper(self, server: Union[str, Plex, None] = None, *args, **kwargs):
+            instance = server if isinstance(server, Plex) else self.get_instance(server)
+            if not instance:
+                # 返回列表时复制一份，避免调用方修改共享的默认值
+                return list(default) if isinstance(default, list) else default
+            return func(self, instance, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
 class PlexModule(_ModuleBase, _MediaServerBase[Plex]):
+    # 实例名称与实例的映射，None 对应默认实例
+    _instance_by_name: Optional[Dict[Optional[str], Plex]] = None
+    # 服务器标识与实例名称的映射，用于Webhook报文直接分发
+    _plex_by_uuid: Optional[Dict[str, str]] = None
 
     def init_module(self) -> None:
         """
@@ -18,6 +45,46 @@ class PlexModule(_ModuleBase, _MediaServerBase[Plex]):
         """
         super().init_service(service_name=Plex.__name__.lower(),
                              service_type=lambda conf: Plex(**conf.config, sync_libraries=conf.sync_libraries))
+        # 缓存名称到实例的映射，实例仅在模块初始化时重建
+        self._instance_by_name = dict(self.get_instances())
+        default_instance = super().get_instance()
+        if default_instance:
+            self._instance_by_name[None] = default_instance
+        # 服务器标识与实例名称的映射
+        self._plex_by_uuid = {}
+        self.__update_plex_by_uuid()
+
+    def __update_plex_by_uuid(self):
+        """
+        记录已连接服务器的标识，启动时未连接的服务器在重连成功后补充
+        """
+        for name, server in self.get_instances().items():
+            plex = server.get_plex() if server else None
+            if plex:
+                self._plex_by_uuid[plex.machineIdentifier] = name
+
+    def __get_name_by_uuid(self, server_uuid: str) -> Optional[str]:
+        """
+        根据服务器标识获取实例名称
+        """
+        if self._plex_by_uuid is None:
+            return None
+        name = self._plex_by_uuid.get(server_uuid)
+        if not name:
+            self.__update_plex_by_uuid()
+            name = self._plex_by_uuid.get(server_uuid)
+        return name
+
+    def get_instance(self, name: Optional[str] = None) -> Optional[Plex]:
+        """
+        获取指定名称的服务实例
+
+        :param name: 实例名称，可选。如果为 None，则返回默认实例
+        :return: 返回符合条件的服务实例，若不存在则返回 None
+        """
+        if not self._instance_by_name:
+            return None
+        return self._instance_by_name.get(name or None)
 
     @staticmethod
     def get_name() -> str:
@@ -51,27 +118,27 @@ class PlexModule(_ModuleBase, _MediaServerBase[Plex]):
         """
         测试模块连接性
         """
-        if not self.get_instances():
+        instances = self.get_instances()
+        if not instances:
             return None
-        for name, server in self.get_instances().items():
-            if server.is_inactive():
-                server.reconnect()
-            if not server.get_librarys():
+        # 并发探测各服务器，总耗时取决于最慢的服务器
+        with ThreadPoolExecutor(max_workers=len(instances)) as executor:
+            futures = {name: executor.submit(self.__probe, server) for name, server in instances.items()}
+        for name, future in futures.items():
+            if not future.result():
                 return False, f"无法连接Plex服务器：{name}"
         return True, ""
 
-    def init_setting(self) -> Tuple[str, Union[str, bool]]:
-        pass
-
-    def scheduler_job(self) -> None:
+    @staticmethod
+    def __probe(server: Plex) -> bool:
         """
-        定时任务，每10分钟调用一次
+        探测服务器连接性，连接断开时先尝试重连
         """
-        # 定时重连
-        for name, server in self.get_instances().items():
-            if server.is_inactive():
-                logger.info(f"Plex {name} 服务器连接断开，尝试重连 ...")
-                server.reconnect()
+        server.ensure_connected(force=True)
+        return True if server.get_librarys() else False
+
+    def init_setting(self) -> Tuple[str, Union[str, bool]]:
+        pass
 
     def user_authenticate(self, credentials: AuthCredentials, service_name: Optional[str] = None) \
             -> Optional[AuthCredentials]:
@@ -122,7 +189,9 @@ class PlexModule(_ModuleBase, _MediaServerBase[Plex]):
         :param args:  请求参数
         :return: 字典，解析为消息时需要包含：title、text、image
         """
-        source = args.get("source")
+        if not form:
+            return None
+        source = args.get("source") if args else None
         if source:
             server: Plex = self.get_instance(source)
             if not server:
@@ -132,9 +201,23 @@ class PlexModule(_ModuleBase, _MediaServerBase[Plex]):
                 result.server_name = source
             return result
 
+        message = Plex.parse_webhook_payload(form)
+        if not message:
+            return None
+        # 根据报文中的服务器标识直接定位实例
+        server_uuid = (message.get("Server") or {}).get("uuid")
+        name = self.__get_name_by_uuid(server_uuid) if server_uuid else None
+        if name:
+            server: Plex = self.get_instance(name)
+            if server:
+                result = server.get_webhook_message(message)
+                if result:
+                    result.server_name = name
+                return result
+
         for server in self.get_instances().values():
             if server:
-                result = server.get_webhook_message(form)
+                result = server.get_webhook_message(message)
                 if result:
                     return result
         return None
@@ -152,54 +235,84 @@ class PlexModule(_ModuleBase, _MediaServerBase[Plex]):
             servers = [(server, self.get_instance(server))]
         else:
             servers = self.get_instances().items()
-        for name, server in servers:
-            if not server:
-                continue
-            if mediainfo.type == MediaType.MOVIE:
-                if itemid:
-                    movie = server.get_iteminfo(itemid)
-                    if movie:
-                        logger.info(f"媒体库 {name} 中找到了 {movie}")
-                        return schemas.ExistMediaInfo(
-                            type=MediaType.MOVIE,
-                            server_type="plex",
-                            server=name,
-                            itemid=movie.item_id
-                        )
-                movies = server.get_movies(title=mediainfo.title,
-                                           original_title=mediainfo.original_title,
-                                           year=mediainfo.year,
-                                           tmdb_id=mediainfo.tmdb_id)
-                if not movies:
-                    logger.info(f"{mediainfo.title_year} 没有在媒体库 {name} 中")
+        servers = [(name, server) for name, server in servers if server]
+        if not servers:
+            return None
+        if len(servers) == 1:
+            name, server = servers[0]
+            return self.__lookup(name=name, server=server, mediainfo=mediainfo, itemid=itemid)
+        # 多个服务器并发查询，任一服务器命中即返回
+        executor = ThreadPoolExecutor(max_workers=len(servers))
+        try:
+            futures = {
+                executor.submit(self.__lookup, name=name, server=server, mediainfo=mediainfo, itemid=itemid): name
+                for name, server in servers
+            }
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as err:
+                    # 单个服务器出错时继续等待其它服务器的结果
+                    logger.error(f"查询媒体库 {futures[future]} 出错：{str(err)}")
                     continue
-                else:
-                    logger.info(f"媒体库 {name} 中找到了 {movies}")
+                if result:
+                    return result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return None
+
+    @staticmethod
+    def __lookup(name: str, server: Plex, mediainfo: MediaInfo,
+                 itemid: str = None) -> Optional[schemas.ExistMediaInfo]:
+        """
+        在指定服务器中查询媒体是否存在
+        :param name:  媒体服务器名称
+        :param server:  媒体服务器实例
+        :param mediainfo:  识别的媒体信息
+        :param itemid:  媒体服务器ItemID
+        :return: 如不存在返回None，存在时返回信息
+        """
+        if mediainfo.type == MediaType.MOVIE:
+            if itemid:
+                movie = server.get_iteminfo(itemid)
+                if movie:
+                    logger.info(f"媒体库 {name} 中找到了 {movie}")
                     return schemas.ExistMediaInfo(
                         type=MediaType.MOVIE,
                         server_type="plex",
                         server=name,
-                        itemid=movies[0].item_id
+                        itemid=movie.item_id
                     )
-            else:
-                item_id, tvs = server.get_tv_episodes(title=mediainfo.title,
-                                                      original_title=mediainfo.original_title,
-                                                      year=mediainfo.year,
-                                                      tmdb_id=mediainfo.tmdb_id,
-                                                      item_id=itemid)
-                if not tvs:
-                    logger.info(f"{mediainfo.title_year} 没有在媒体库 {name} 中")
-                    continue
-                else:
-                    logger.info(f"{mediainfo.title_year} 在媒体库 {name} 中找到了这些季集：{tvs}")
-                    return schemas.ExistMediaInfo(
-                        type=MediaType.TV,
-                        seasons=tvs,
-                        server_type="plex",
-                        server=name,
-                        itemid=item_id
-                    )
-        return None
+            movies = server.get_movies(title=mediainfo.title,
+                                       original_title=mediainfo.original_title,
+                                       year=mediainfo.year,
+                                       tmdb_id=mediainfo.tmdb_id)
+            if not movies:
+                logger.info(f"{mediainfo.title_year} 没有在媒体库 {name} 中")
+                return None
+            logger.info(f"媒体库 {name} 中找到了 {movies}")
+            return schemas.ExistMediaInfo(
+                type=MediaType.MOVIE,
+                server_type="plex",
+                server=name,
+                itemid=movies[0].item_id
+            )
+        item_id, tvs = server.get_tv_episodes(title=mediainfo.title,
+                                              original_title=mediainfo.original_title,
+                                              year=mediainfo.year,
+                                              tmdb_id=mediainfo.tmdb_id,
+                                              item_id=itemid)
+        if not tvs:
+            logger.info(f"{mediainfo.title_year} 没有在媒体库 {name} 中")
+            return None
+        logger.info(f"{mediainfo.title_year} 在媒体库 {name} 中找到了这些季集：{tvs}")
+        return schemas.ExistMediaInfo(
+            type=MediaType.TV,
+            seasons=tvs,
+            server_type="plex",
+            server=name,
+            itemid=item_id
+        )
 
     def media_statistic(self, server: str = None) -> Optional[List[schemas.Statistic]]:
         """
@@ -211,89 +324,83 @@ class PlexModule(_ModuleBase, _MediaServerBase[Plex]):
                 return None
             servers = [server_obj]
         else:
-            servers = self.get_instances().values()
-        media_statistics = []
-        for server in servers:
-            media_statistic = server.get_medias_count()
-            if not media_statistic:
-                continue
+            servers = [server for server in self.get_instances().values() if server]
+        if not servers:
+            return []
+        # 并发获取各服务器统计
+        with ThreadPoolExecutor(max_workers=len(servers)) as executor:
+            results = list(executor.map(lambda s: s.get_medias_count(), servers))
+        media_statistics = [media_statistic for media_statistic in results if media_statistic]
+        for media_statistic in media_statistics:
             media_statistic.user_count = 1
-            media_statistics.append(media_statistic)
         return media_statistics
 
-    def mediaserver_librarys(self, server: str = None, hidden: bool = False,
+    @_with_plex(None)
+    def mediaserver_librarys(self, server: Union[str, Plex, None] = None, hidden: bool = False,
                              **kwargs) -> Optional[List[schemas.MediaServerLibrary]]:
         """
         媒体库列表
         """
-        server_obj: Plex = self.get_instance(server)
-        if server_obj:
-            return server_obj.get_librarys(hidden)
-        return None
+        return server.get_librarys(hidden)
 
-    def mediaserver_items(self, server: str, library_id: Union[str, int], start_index: int = 0,
-                          limit: Optional[int] = -1) -> Optional[Generator]:
+    @_with_plex(None)
+    def mediaserver_items(self, server: Union[str, Plex], library_id: Union[str, int], start_index: int = 0,
+                          limit: Optional[int] = -1,
+                          stream: bool = False) -> Optional[Union[List[schemas.MediaServerItem], Generator]]:
         """
         获取媒体服务器项目列表，支持分页和不分页逻辑，默认不分页获取所有数据
 
-        :param server: 媒体服务器名称
+        :param server: 媒体服务器名称，也可传入已解析的实例
         :param library_id: 媒体库ID，用于标识要获取的媒体库
         :param start_index: 起始索引，用于分页获取数据。默认为 0，即从第一个项目开始获取
         :param limit: 每次请求的最大项目数，用于分页。如果为 None 或 -1，则表示一次性获取所有数据，默认为 -1
+        :param stream: 是否以生成器形式逐步返回，不分页时始终以生成器返回
 
-        :return: 返回一个生成器对象，用于逐步获取媒体服务器中的项目
+        :return: 分页时返回项目列表，stream 为 True 或不分页时返回生成器对象
         """
-        server_obj: Plex = self.get_instance(server)
-        if server_obj:
-            return server_obj.get_items(library_id, start_index, limit)
-        return None
+        return server.get_items(library_id, start_index, limit, stream=stream)
 
-    def mediaserver_iteminfo(self, server: str, item_id: str) -> Optional[schemas.MediaServerItem]:
+    @_with_plex(None)
+    def mediaserver_iteminfo(self, server: Union[str, Plex], item_id: str) -> Optional[schemas.MediaServerItem]:
         """
         媒体库项目详情
         """
-        server_obj: Plex = self.get_instance(server)
-        if server_obj:
-            return server_obj.get_iteminfo(item_id)
-        return None
+        return server.get_iteminfo(item_id)
 
-    def mediaserver_tv_episodes(self, server: str,
+    @_with_plex(None)
+    def mediaserver_tv_episodes(self, server: Union[str, Plex],
                                 item_id: Union[str, int]) -> Optional[List[schemas.MediaServerSeasonInfo]]:
         """
         获取剧集信息
         """
-        server_obj: Plex = self.get_instance(server)
-        if not server_obj:
-            return None
-        _, seasoninfo = server_obj.get_tv_episodes(item_id=item_id)
+        _, seasoninfo = server.get_tv_episodes(item_id=item_id)
         if not seasoninfo:
             return []
-        return [schemas.MediaServerSeasonInfo(
+        # 跳过校验直接构造：季号允许为None，未匹配条目的集号可能为None，需先过滤
+        return [schemas.MediaServerSeasonInfo.construct(
             season=season,
-            episodes=episodes
+            episodes=[episode for episode in episodes if episode is not None]
         ) for season, episodes in seasoninfo.items()]
 
-    def mediaserver_playing(self, server: str, count: int = 20, **kwargs) -> List[schemas.MediaServerPlayItem]:
+    @_with_plex([])
+    def mediaserver_playing(self, server: Union[str, Plex], count: int = 20,
+                            **kwargs) -> List[schemas.MediaServerPlayItem]:
         """
         获取媒体服务器正在播放信息
         """
-        server_obj: Plex = self.get_instance(server)
-        if not server_obj:
-            return []
-        return server_obj.get_resume(num=count)
+        return server.get_resume(num=count)
 
-    def mediaserver_latest(self, server: str = None, count: int = 20,
+    @_with_plex([])
+    def mediaserver_latest(self, server: Union[str, Plex, None] = None, count: int = 20,
                            **kwargs) -> List[schemas.MediaServerPlayItem]:
         """
         获取媒体服务器最新入库条目
         """
-        server_obj: Plex = self.get_instance(server)
-        if not server_obj:
-            return []
-        return server_obj.get_latest(num=count)
+        return server.get_latest(num=count)
 
+    @_with_plex([])
     def mediaserver_latest_images(self,
-                                  server: str = None,
+                                  server: Union[str, Plex, None] = None,
                                   count: int = 20,
                                   username: str = None,
                                   **kwargs
@@ -301,31 +408,25 @@ class PlexModule(_ModuleBase, _MediaServerBase[Plex]):
         """
         获取媒体服务器最新入库条目的图片
 
-        :param server: 媒体服务器名称
+        :param server: 媒体服务器名称，也可传入已解析的实例
         :param count: 获取数量
         :param username: 用户名
         :return: 图片链接列表
         """
-        server_obj: Plex = self.get_instance(server)
-        if not server_obj:
-            return []
-
         links = []
         items: List[schemas.MediaServerPlayItem] = self.mediaserver_latest(server=server, count=count,
                                                                            username=username)
         for item in items:
-            link = server_obj.get_remote_image_by_id(item_id=item.id,
-                                                     image_type="Backdrop",
-                                                     plex_url=False)
+            link = server.get_remote_image_by_id(item_id=item.id,
+                                                 image_type="Backdrop",
+                                                 plex_url=False)
             if link:
                 links.append(link)
         return links
 
-    def mediaserver_play_url(self, server: str, item_id: Union[str, int]) -> Optional[str]:
+    @_with_plex(None)
+    def mediaserver_play_url(self, server: Union[str, Plex], item_id: Union[str, int]) -> Optional[str]:
         """
         获取媒体库播放地址
         """
-        server_obj: Plex = self.get_instance(server)
-        if not server_obj:
-            return None
-        return server_obj.get_play_url(item_id)
+        return server.get_play_url(item_id)
@@ -1,4 +1,6 @@
 import json
+import threading
+import time
 from pathlib import Path
 from typing import List, Optional, Dict, Tuple, Generator, Any, Union
 from urllib.parse import quote_plus
@@ -19,10 +21,17 @@ from app.utils.url import UrlUtils
 class Plex:
     _plex = None
     _session = None
+    _host = None
+    _token = None
+    _playhost = None
     _sync_libraries: List[str] = []
+    # 连接断开后再次尝试重连的最小间隔（秒）
+    _reconnect_interval = 60
+    _last_connect_time = 0
 
     def __init__(self, host: str = None, token: str = None, play_host: str = None,
                  sync_libraries: list = None, **kwargs):
+        self._connect_lock = threading.Lock()
         if not host or not token:
             logger.error("Plex服务器配置不完整！")
             return
@@ -40,6 +49,7 @@ class Plex:
             except Exception as e:
                 self._plex = None
                 logger.error(f"Plex服务器连接失败：{str(e)}")
+            self._last_connect_time = time.time()
             self._session = self.__adapt_plex_session()
         self._sync_libraries = sync_libraries or []
 
@@ -62,6 +72,24 @@ class Plex:
             self._plex = None
             logger.error(f"Plex服务器连接失败：{str(e)}")
 
+    def ensure_connected(self, force: bool = False) -> bool:
+        """
+        按需重连，连接断开时在实际调用时才尝试重连，失败后间隔一段时间再重试
+        :param force: 是否忽略重连间隔立即尝试重连
+        :return: 是否已连接
+        """
+        if self._plex:
+            return True
+        if not self.is_inactive():
+            return False
+        with self._connect_lock:
+            # 加锁后再次判断，避免并发调用时重复重连
+            if not self._plex and (force or time.time() - self._last_connect_time >= self._reconnect_interval):
+                logger.info(f"Plex服务器 {self._host} 连接断开，尝试重连 ...")
+                self.reconnect()
+                self._last_connect_time = time.time()
+        return True if self._plex else False
+
     def authenticate(self, username: str, password: str) -> Optional[Tuple[str, str]]:
         """
         用户认证
@@ -90,7 +118,7 @@ class Plex:
         param: library_key
         param: type type的含义: 1 电影 2 剧集 详见 plexapi/utils.py中SEARCHTYPES的定义
         """
-        if not self._plex:
+        if not self.ensure_connected():
             return None
         # 返回结果
         poster_urls = {}
@@ -125,7 +153,7 @@ class Plex:
         """
         获取媒体服务器所有媒体库列表
         """
-        if not self._plex:
+        if not self.ensure_connected():
             return []
         try:
             self._libraries = self._plex.library.sections()
@@ -164,7 +192,7 @@ class Plex:
         获得电影、电视剧、动漫媒体数量
         :return: movie_count tv_count episode_count
         """
-        if not self._plex:
+        if not self.ensure_connected():
             return schemas.Statistic()
         sections = self._plex.library.sections()
         movie_count = tv_count = episode_count = 0
@@ -197,7 +225,7 @@ class Plex:
         :param tmdb_id: TMDB ID
         :return: 含title、year属性的字典列表
         """
-        if not self._plex:
+        if not self.ensure_connected():
             return None
         ret_movies = []
         if year:
@@ -257,7 +285,7 @@ class Plex:
         :param season: 季号，数字
         :return: 所有集的列表
         """
-        if not self._plex:
+        if not self.ensure_connected():
             return None, {}
         if item_id:
             videos = self.__fetch_item(item_id)
@@ -306,7 +334,7 @@ class Plex:
         :param plex_url: 是否返回Plex的URL，默认为True（仅在配置了外网地址和Token时有效）
         :return: 图片对应在plex服务器或TMDB中的URL
         """
-        if not self._plex or depth > 2 or not item_id:
+        if not self.ensure_connected() or depth > 2 or not item_id:
             return None
         try:
             image_url = None
@@ -363,7 +391,7 @@ class Plex:
         """
         通知Plex刷新整个媒体库
         """
-        if not self._plex:
+        if not self.ensure_connected():
             return False
         return self._plex.library.update()
 
@@ -371,7 +399,7 @@ class Plex:
         """
         按路径刷新媒体库 item: target_path
         """
-        if not self._plex:
+        if not self.ensure_connected():
             return False
         result_dict = {}
         for item in items:
@@ -420,7 +448,7 @@ class Plex:
         """
         获取单个项目详情
         """
-        if not self._plex:
+        if not self.ensure_connected():
             return None
         try:
             item = self.__fetch_item(itemid)
@@ -511,19 +539,30 @@ class Plex:
             user_state=user_state,
         )
 
-    def get_items(self, parent: Union[str, int], start_index: int = 0, limit: Optional[int] = -1) \
-            -> Optional[Generator]:
+    def get_items(self, parent: Union[str, int], start_index: int = 0, limit: Optional[int] = -1,
+                  stream: bool = False) -> Union[List[schemas.MediaServerItem], Generator]:
         """
         获取媒体服务器项目列表，支持分页和不分页逻辑，默认不分页获取所有数据
 
         :param parent: 媒体库ID，用于标识要获取的媒体库
         :param start_index: 起始索引，用于分页获取数据。默认为 0，即从第一个项目开始获取
         :param limit: 每次请求的最大项目数，用于分页。如果为 None 或 -1，则表示一次性获取所有数据，默认为 -1
+        :param stream: 是否以生成器形式逐步返回，不分页时始终以生成器返回，避免一次性占用过多内存
 
-        :return: 返回一个生成器对象，用于逐步获取媒体服务器中的项目
+        :return: 分页时返回项目列表（单次分页请求获取），stream 为 True 或不分页时返回生成器对象
+        """
+        if not parent or not self.ensure_connected():
+            return []
+        items = self.__iter_items(parent, start_index, limit)
+        if stream or limit is None or limit == -1:
+            return items
+        return list(items)
+
+    def __iter_items(self, parent: Union[str, int], start_index: int = 0,
+                     limit: Optional[int] = -1) -> Generator:
+        """
+        逐步获取媒体服务器项目，分页时通过Plex原生分页参数单次请求获取
         """
-        if not parent or not self._plex:
-            return None
         try:
             section = self._plex.library.sectionByID(int(parent))
             if section:
@@ -542,6 +581,24 @@ class Plex:
         except Exception as err:
             logger.error(f"获取媒体库列表出错：{str(err)}")
 
+    @staticmethod
+    def parse_webhook_payload(form: any) -> Optional[dict]:
+        """
+        解析Plex Webhook表单中的payload报文
+        :param form: 请求表单
+        :return: 报文字典，解析失败返回None
+        """
+        if not form:
+            return None
+        payload = form.get("payload")
+        if not payload:
+            return None
+        try:
+            return json.loads(payload)
+        except Exception as e:
+            logger.debug(f"解析plex webhook出错：{str(e)}")
+            return None
+
     def get_webhook_message(self, form: any) -> Optional[schemas.WebhookEventInfo]:
         """
         解析Plex报文
@@ -648,13 +705,9 @@ class Plex:
         """
         if not form:
             return None
-        payload = form.get("payload")
-        if not payload:
-            return None
-        try:
-            message = json.loads(payload)
-        except Exception as e:
-            logger.debug(f"解析plex webhook出错：{str(e)}")
+        # 已解析的报文直接使用，避免重复解析
+        message = form if isinstance(form, dict) else self.parse_webhook_payload(form)
+        if not message:
             return None
         eventType = message.get('event')
         if not eventType:
@@ -722,7 +775,7 @@ class Plex:
         """
         获取继续观看的媒体
         """
-        if not self._plex:
+        if not self.ensure_connected():
             return []
         # 媒体库白名单
         allow_library = ",".join(map(str, (lib.id for lib in self.get_librarys(hidden=True))))
@@ -737,13 +790,14 @@ class Plex:
             item_type = MediaType.MOVIE.value if item.TYPE == "movie" else MediaType.TV.value
             if item_type == MediaType.MOVIE.value:
                 title = item.title
-                subtitle = item.year
+                subtitle = str(item.year) if item.year else None
             else:
                 title = item.grandparentTitle
                 subtitle = f"S{item.parentIndex}:E{item.index} - {item.title}"
             link = self.get_play_url(item.key)
             image = item.artUrl
-            ret_resume.append(schemas.MediaServerPlayItem(
+            # 字段均由Plex数据直接生成且类型已确定，跳过校验直接构造，由接口层统一按响应模型序列化
+            ret_resume.append(schemas.MediaServerPlayItem.construct(
                 id=item.key,
                 title=title,
                 subtitle=subtitle,
@@ -758,7 +812,7 @@ class Plex:
         """
         获取最近添加媒体
         """
-        if not self._plex:
+        if not self.ensure_connected():
             return None
         # 请求参数（除黑名单）
         allow_library = ",".join(map(str, (lib.id for lib in self.get_librarys(hidden=True))))
@@ -812,10 +866,10 @@ class Plex:
                     title = "%s 共%s季" % (item.title, item.seasonCount)
                     image = item.posterUrl
                 link = self.get_play_url(item.key)
-                ret_resume.append(schemas.MediaServerPlayItem(
+                ret_resume.append(schemas.MediaServerPlayItem.construct(
                     id=item.key,
                     title=title,
-                    subtitle=item.year,
+                    subtitle=str(item.year) if item.year else None,
                     type=item_type,
                     image=image,
                     link=link
@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import Any, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, validator
 
 
 # Shared properties
@@ -10,17 +10,35 @@ class UserBase(BaseModel):
     # 邮箱，未启用
     email: Optional[str] = None
     # 状态
-    is_active: Optional[bool] = True
+    is_active: bool = True
     # 超级管理员
     is_superuser: bool = False
     # 头像
     avatar: Optional[str] = None
     # 是否开启二次验证
-    is_otp: Optional[bool] = False
+    is_otp: bool = False
     # 权限
-    permissions: Optional[dict] = {}
+    permissions: dict = Field(default_factory=dict)
     # 个性化设置
-    settings: Optional[dict] = {}
+    settings: dict = Field(default_factory=dict)
+
+    @validator('is_otp', 'permissions', 'settings', pre=True)
+    def none_to_default(cls, value: Any, field):
+        """
+        数据库中可能存在为NULL的字段，转换为字段默认值
+        """
+        if value is None:
+            return field.get_default()
+        return value
+
+    @validator('is_active', pre=True)
+    def none_to_inactive(cls, value: Any):
+        """
+        数据库中状态为NULL时认证视为未激活，这里保持一致
+        """
+        if value is None:
+            return False
+        return value
 
     class Config:
         orm_mode = True
@@ -31,7 +49,7 @@ class UserCreate(UserBase):
     name: str
     email: Optional[str] = None
     password: Optional[str] = None
-    settings: Optional[dict] = {}
+    settings: dict = Field(default_factory=dict)
 
 
 # Properties to receive via API on update
@@ -40,7 +58,7 @@ class UserUpdate(UserBase):
     name: str
     email: Optional[str] = None
     password: Optional[str] = None
-    settings: Optional[dict] = {}
+    settings: dict = Field(default_factory=dict)
 
 
 class UserInDBBase(UserBase):
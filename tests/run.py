@@ -1,6 +1,8 @@
 import unittest
 
 from tests.test_metainfo import MetaInfoTest
+from tests.test_plex import PlexUnconfiguredTest, PlexReconnectTest, PlexModuleTest
+from tests.test_user import UserSchemaTest
 
 if __name__ == '__main__':
     suite = unittest.TestSuite()
@@ -8,6 +10,25 @@ if __name__ == '__main__':
     # 测试名称识别
     suite.addTest(MetaInfoTest('test_metainfo'))
 
+    # 测试Plex未配置时的返回值
+    suite.addTest(PlexUnconfiguredTest('test_unconfigured_returns_empty'))
+
+    # 测试Plex按需重连
+    suite.addTest(PlexReconnectTest('test_throttle'))
+    suite.addTest(PlexReconnectTest('test_force'))
+    suite.addTest(PlexReconnectTest('test_concurrent'))
+
+    # 测试Plex模块实例解析与Webhook分发
+    suite.addTest(PlexModuleTest('test_with_plex'))
+    suite.addTest(PlexModuleTest('test_webhook_dispatch_by_uuid'))
+    suite.addTest(PlexModuleTest('test_webhook_dispatch_reconnected'))
+    suite.addTest(PlexModuleTest('test_webhook_dispatch_fallback'))
+    suite.addTest(PlexModuleTest('test_media_exists_server_error'))
+
+    # 测试用户模型空值处理
+    suite.addTest(UserSchemaTest('test_none_to_default'))
+    suite.addTest(UserSchemaTest('test_from_orm'))
+
     # 运行测试
     runner = unittest.TextTestRunner()
     runner.run(suite)
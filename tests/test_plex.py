@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+import time
+from types import SimpleNamespace
+from unittest import TestCase
+
+from app import schemas
+from app.core.context import MediaInfo
+from app.modules.plex import PlexModule, _with_plex
+from app.modules.plex.plex import Plex
+from app.schemas.types import MediaType
+
+
+class PlexUnconfiguredTest(TestCase):
+    def setUp(self) -> None:
+        self.plex = Plex(host="http://localhost:32400", token=None)
+
+    def tearDown(self) -> None:
+        pass
+
+    def test_unconfigured_returns_empty(self):
+        self.assertFalse(self.plex.is_inactive())
+        self.assertEqual(self.plex.get_librarys(), [])
+        self.assertEqual(self.plex.get_resume(), [])
+        self.assertEqual(self.plex.get_medias_count(), schemas.Statistic())
+        self.assertEqual(self.plex.get_tv_episodes(title="A"), (None, {}))
+
+
+class PlexReconnectTest(TestCase):
+    def setUp(self) -> None:
+        self.plex = Plex(host="http://localhost:32400", token=None)
+        # 模拟已配置但连接断开的服务器
+        self.plex._host = "http://localhost:32400/"
+        self.plex._token = "token"
+        self.reconnect_count = 0
+        self.plex.reconnect = self.__reconnect
+
+    def tearDown(self) -> None:
+        pass
+
+    def __reconnect(self):
+        self.reconnect_count += 1
+        time.sleep(0.1)
+        self.plex._plex = SimpleNamespace(machineIdentifier="uuid")
+
+    def test_throttle(self):
+        # 重连失败后间隔内不再重连
+        self.plex._last_connect_time = time.time()
+        self.assertTrue(self.plex.is_inactive())
+        self.assertFalse(self.plex.ensure_connected())
+        self.assertEqual(self.reconnect_count, 0)
+
+    def test_force(self):
+        self.plex._last_connect_time = time.time()
+        self.assertTrue(self.plex.ensure_connected(force=True))
+        self.assertEqual(self.reconnect_count, 1)
+
+    def test_concurrent(self):
+        # 并发调用只重连一次
+        threads = [threading.Thread(target=self.plex.ensure_connected) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.reconnect_count, 1)
+        self.assertTrue(self.plex.ensure_connected())
+        self.assertEqual(self.reconnect_count, 1)
+
+
+class PlexModuleTest(TestCase):
+    def setUp(self) -> None:
+        self.server_a = Plex(host="http://a:32400", token=None)
+        self.server_b = Plex(host="http://b:32400", token=None)
+        self.module = PlexModule()
+        self.module._instances = {"A": self.server_a, "B": self.server_b}
+        self.module._instance_by_name = {"A": self.server_a, "B": self.server_b, None: self.server_a}
+        self.module._plex_by_uuid = {}
+
+    def tearDown(self) -> None:
+        pass
+
+    @staticmethod
+    def __form(server_uuid: str) -> dict:
+        return {"payload": json.dumps({"event": "media.play", "Server": {"uuid": server_uuid}})}
+
+    def test_with_plex(self):
+        @_with_plex([])
+        def echo(_, server):
+            return server
+
+        self.assertIs(echo(self.module, "B"), self.server_b)
+        self.assertIs(echo(self.module, self.server_b), self.server_b)
+        self.assertIs(echo(self.module, None), self.server_a)
+        self.assertEqual(echo(self.module, "C"), [])
+        # 默认列表每次返回副本
+        self.assertIsNot(echo(self.module, "C"), echo(self.module, "C"))
+
+    def test_webhook_dispatch_by_uuid(self):
+        self.module._plex_by_uuid = {"uuid-b": "B"}
+        result = self.module.webhook_parser(body=None, form=self.__form("uuid-b"), args={})
+        self.assertEqual(result.server_name, "B")
+
+    def test_webhook_dispatch_reconnected(self):
+        # 启动时未连接的服务器重连后应加入映射
+        self.server_b._plex = SimpleNamespace(machineIdentifier="uuid-b")
+        result = self.module.webhook_parser(body=None, form=self.__form("uuid-b"), args={})
+        self.assertEqual(result.server_name, "B")
+        self.assertEqual(self.module._plex_by_uuid, {"uuid-b": "B"})
+
+    def test_webhook_dispatch_fallback(self):
+        result = self.module.webhook_parser(body=None, form=self.__form("uuid-x"), args={})
+        # 未知服务器的报文不标记服务器名称
+        self.assertIsNotNone(result)
+        self.assertIsNone(result.server_name)
+        self.assertIsNone(self.module.webhook_parser(body=None, form={}, args={}))
+
+    def test_media_exists_server_error(self):
+        def hit(**kwargs):
+            time.sleep(0.2)
+            return [SimpleNamespace(item_id="1")]
+
+        def fail(**kwargs):
+            time.sleep(0.01)
+            raise ConnectionError("unreachable")
+
+        # 单个服务器出错不影响其它服务器的命中结果
+        self.server_a.get_movies = hit
+        self.server_b.get_movies = fail
+        result = self.module.media_exists(MediaInfo(type=MediaType.MOVIE, title="A", year="2020"))
+        self.assertEqual(result.server, "A")
+        self.assertEqual(result.itemid, "1")
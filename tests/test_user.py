@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from types import SimpleNamespace
+from unittest import TestCase
+
+from app.schemas.user import UserBase, User
+
+
+class UserSchemaTest(TestCase):
+    def setUp(self) -> None:
+        pass
+
+    def tearDown(self) -> None:
+        pass
+
+    def test_none_to_default(self):
+        user = UserBase(name="a", is_active=None, is_otp=None, permissions=None, settings=None)
+        # 状态为NULL时与认证保持一致，视为未激活
+        self.assertFalse(user.is_active)
+        self.assertFalse(user.is_otp)
+        self.assertEqual(user.permissions, {})
+        self.assertEqual(user.settings, {})
+        # 默认值不在实例间共享
+        self.assertIsNot(user.settings, UserBase(name="b").settings)
+        self.assertTrue(UserBase(name="b").is_active)
+
+    def test_from_orm(self):
+        user = User.from_orm(SimpleNamespace(id=1, name="a", email=None, is_active=None, is_superuser=False,
+                                             avatar=None, is_otp=None, permissions=None, settings=None))
+        self.assertFalse(user.is_active)
+        self.assertFalse(user.is_otp)
+        self.assertEqual(user.permissions, {})
+        self.assertEqual(user.settings, {})